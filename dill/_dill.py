@@ -40,6 +40,7 @@ __module__ = 'dill'
 import warnings
 from .logger import adapter as logger
 from .logger import trace as _trace
+from logging import INFO
 log = logger # backward compatibility (see issue #582)
 
 import os
@@ -54,8 +55,11 @@ OLD312a7 = (sys.hexversion < 0x30c00a7)
 import builtins as __builtin__
 from pickle import _Pickler as StockPickler, Unpickler as StockUnpickler
 from pickle import GLOBAL, POP
+from pickle import dump as _stock_dump, dumps as _stock_dumps, loads as _stock_loads
 from _thread import LockType
 from _thread import RLock as RLockType
+from _thread import get_ident
+RLOCK_COUNT = hasattr(RLockType, '_recursion_count')
 try:
     from _thread import _ExceptHookArgs as ExceptHookArgsType
 except ImportError:
@@ -75,6 +79,7 @@ NotImplementedType = type(NotImplemented)
 SliceType = slice
 TypeType = type # 'new-style' classes #XXX: unregistered
 XRangeType = range
+import types
 from types import MappingProxyType as DictProxyType, new_class
 from pickle import DEFAULT_PROTOCOL, HIGHEST_PROTOCOL, PickleError, PicklingError, UnpicklingError
 import __main__ as _main_module
@@ -86,7 +91,7 @@ import dataclasses
 from weakref import ReferenceType, ProxyType, CallableProxyType
 from collections import OrderedDict
 from enum import Enum, EnumMeta
-from functools import partial
+from functools import partial, lru_cache
 from operator import itemgetter, attrgetter
 GENERATOR_FAIL = False
 import importlib.machinery
@@ -117,25 +122,39 @@ def __hook__():
     from numpy import dtype as NumpyDType
     return True
 if NumpyArrayType: # then has numpy
+    def _numpy_imported(obj_type):
+        # import numpy only for a type that comes from numpy
+        if NumpyArrayType is True:
+            if sys.modules.get('numpy') is None or \
+                    all(c.__module__ != 'numpy' for c in obj_type.__mro__):
+                return False
+            try:
+                return __hook__()
+            except ImportError: # a stub, or numpy is still being imported
+                return False
+        return True
+    def _numpy_type(obj_type):
+        # a single check for all of ufunc, dtype and ndarray types
+        return _numpy_imported(obj_type) and \
+            issubclass(obj_type, (NumpyUfuncType, NumpyDType, NumpyArrayType))
     def ndarraysubclassinstance(obj_type):
-        if all((c.__module__, c.__name__) != ('numpy', 'ndarray') for c in obj_type.__mro__):
+        if not (_numpy_imported(obj_type) and issubclass(obj_type, NumpyArrayType)):
             return False
         # anything below here is a numpy array (or subclass) instance
-        __hook__() # import numpy (so the following works!!!)
         # verify that __reduce__ has not been overridden
         if obj_type.__reduce_ex__ is not NumpyArrayType.__reduce_ex__ \
                 or obj_type.__reduce__ is not NumpyArrayType.__reduce__:
             return False
         return True
     def numpyufunc(obj_type):
-        return any((c.__module__, c.__name__) == ('numpy', 'ufunc') for c in obj_type.__mro__)
+        return _numpy_imported(obj_type) and issubclass(obj_type, NumpyUfuncType)
     def numpydtype(obj_type):
-        if all((c.__module__, c.__name__) != ('numpy', 'dtype') for c in obj_type.__mro__):
+        if not (_numpy_imported(obj_type) and issubclass(obj_type, NumpyDType)):
             return False
         # anything below here is a numpy dtype
-        __hook__() # import numpy (so the following works!!!)
         return obj_type is type(NumpyDType) # handles subclasses
 else:
+    def _numpy_type(obj_type): return False
     def ndarraysubclassinstance(obj): return False
     def numpyufunc(obj): return False
     def numpydtype(obj): return False
@@ -168,17 +187,20 @@ def get_file_type(*args, **kwargs):
 
 IS_PYODIDE = sys.platform == 'emscripten'
 
-FileType = get_file_type('rb', buffering=0)
-TextWrapperType = get_file_type('r', buffering=-1)
-BufferedRandomType = None if IS_PYODIDE else get_file_type('r+b', buffering=-1)
-BufferedReaderType = get_file_type('rb', buffering=-1)
-BufferedWriterType = get_file_type('wb', buffering=-1)
+# the types open() returns for each mode (as get_file_type would find)
+import io
+FileType = io.FileIO
+TextWrapperType = io.TextIOWrapper
+BufferedRandomType = None if IS_PYODIDE else io.BufferedRandom
+BufferedReaderType = io.BufferedReader
+BufferedWriterType = io.BufferedWriter
 try:
     from _pyio import open as _open
-    PyTextWrapperType = get_file_type('r', buffering=-1, open=_open)
-    PyBufferedRandomType = None if IS_PYODIDE else get_file_type('r+b', buffering=-1, open=_open)
-    PyBufferedReaderType = get_file_type('rb', buffering=-1, open=_open)
-    PyBufferedWriterType = get_file_type('wb', buffering=-1, open=_open)
+    from _pyio import TextIOWrapper as PyTextWrapperType
+    from _pyio import BufferedReader as PyBufferedReaderType
+    from _pyio import BufferedWriter as PyBufferedWriterType
+    if IS_PYODIDE: PyBufferedRandomType = None
+    else: from _pyio import BufferedRandom as PyBufferedRandomType
 except ImportError:
     PyTextWrapperType = PyBufferedRandomType = PyBufferedReaderType = PyBufferedWriterType = None
 from io import BytesIO as StringIO
@@ -238,6 +260,40 @@ CONTENTS_FMODE = 1
 FILE_FMODE = 2
 
 ### Shorthands (modified from python2.5/lib/pickle.py)
+# types that dill pickles exactly as pickle does (unless dispatch is changed)
+_PLAIN_ATOMS = frozenset((type(None), bool, int, float, str, bytes))
+_PLAIN_CONTAINERS = (list, tuple, dict)
+# below protocol 3, dill pickles b'' as _load_type('bytes')() and pickle does not
+_PLAIN_ATOMS_NO_BYTES = _PLAIN_ATOMS - {bytes}
+
+def _is_plain_data(obj, protocol, depth=4, size=256):
+    """check if obj is basic data, looking at no more than size items"""
+    atoms = _PLAIN_ATOMS if protocol >= 3 else _PLAIN_ATOMS_NO_BYTES
+    level = [obj]
+    while level:
+        nested = []
+        for obj in level:
+            obj_type = type(obj)
+            if obj_type in atoms:
+                continue
+            if not depth or obj_type not in _PLAIN_CONTAINERS:
+                return False
+            size -= len(obj)
+            if size < 0:
+                return False
+            if obj_type is dict:
+                if '__name__' in obj: # may be a module's __dict__
+                    return False
+                if not atoms.issuperset(map(type, obj)):
+                    nested.extend(obj)
+                obj = obj.values()
+            if not atoms.issuperset(map(type, obj)):
+                nested.extend(obj)
+        level = nested
+        depth -= 1
+    # a user may have registered their own function for one of the types
+    return _plain_dispatch.items() <= Pickler.dispatch.items()
+
 def copy(obj, *args, **kwds):
     """
     Use pickling to 'copy' an object (i.e. `loads(dumps(obj))`).
@@ -245,6 +301,10 @@ def copy(obj, *args, **kwds):
     See :func:`dumps` and :func:`loads` for keyword arguments.
     """
     ignore = kwds.pop('ignore', Unpickler.settings['ignore'])
+    protocol = Pickler.settings['protocol']
+    if not args and not kwds and _is_plain_data(obj, protocol) and not logger.isEnabledFor(INFO):
+        # dill adds nothing to pickling or unpickling basic data
+        return _stock_loads(_stock_dumps(obj, protocol))
     return loads(dumps(obj, *args, **kwds), ignore=ignore)
 
 def dump(obj, file, protocol=None, byref=None, fmode=None, recurse=None, **kwds):#, strictio=None):
@@ -255,9 +315,11 @@ def dump(obj, file, protocol=None, byref=None, fmode=None, recurse=None, **kwds)
     """
     from .settings import settings
     protocol = settings['protocol'] if protocol is None else int(protocol)
-    _kwds = kwds.copy()
-    _kwds.update(dict(byref=byref, fmode=fmode, recurse=recurse))
-    Pickler(file, protocol, **_kwds).dump(obj)
+    if not kwds and _is_plain_data(obj, protocol) and not logger.isEnabledFor(INFO):
+        # same output as dill's Pickler, but written by the C pickler
+        _stock_dump(obj, file, protocol)
+        return
+    Pickler(file, protocol, byref=byref, fmode=fmode, recurse=recurse, **kwds).dump(obj)
     return
 
 def dumps(obj, protocol=None, byref=None, fmode=None, recurse=None, **kwds):#, strictio=None):
@@ -282,6 +344,11 @@ def dumps(obj, protocol=None, byref=None, fmode=None, recurse=None, **kwds):#, s
     pickle and cursor position so that a remote method can operate
     transparently on an object with an open file handle.
 
+    Other keyword arguments are passed to :class:`Pickler`. For example, with
+    *protocol=5*, a *buffer_callback* collects :class:`pickle.PickleBuffer`
+    data out-of-band instead of copying it into the pickle; pass the
+    collected buffers to :func:`loads` as *buffers*.
+
     Default values for keyword arguments can be set in :mod:`dill.settings`.
     """
     file = StringIO()
@@ -322,16 +389,19 @@ def loads(str, ignore=None, **kwds):
 
 class MetaCatchingDict(dict):
     def get(self, key, default=None):
-        try:
-            return self[key]
-        except KeyError:
-            return default
+        func = dict.get(self, key)
+        if func is not None:
+            return func
+        # only consult the metaclass fallback on a miss
+        if isinstance(key, type) and issubclass(key, type):
+            return save_type
+        return default
 
     def __missing__(self, key):
-        if issubclass(key, type):
+        if isinstance(key, type) and issubclass(key, type):
             return save_type
         else:
-            raise KeyError()
+            raise KeyError(key)
 
 class PickleWarning(Warning, PickleError):
     pass
@@ -342,6 +412,38 @@ class PicklingWarning(PickleWarning, PicklingError):
 class UnpicklingWarning(PickleWarning, UnpicklingError):
     pass
 
+# savers registered by Pickler.save for each numpy type, when first seen
+def _save_numpy_ufunc(pickler, obj):
+    logger.trace(pickler, "Nu: %s", obj)
+    name = getattr(obj, '__qualname__', getattr(obj, '__name__', None))
+    StockPickler.save_global(pickler, obj, name=name)
+    logger.trace(pickler, "# Nu")
+    return
+# NOTE: the above 'save' performs like:
+#   import copy_reg
+#   def udump(f): return f.__name__
+#   def uload(name): return getattr(numpy, name)
+#   copy_reg.pickle(NumpyUfuncType, udump, uload)
+
+def _save_numpy_dtype(pickler, obj):
+    logger.trace(pickler, "Dt: %s", obj)
+    pickler.save_reduce(_create_dtypemeta, (obj.type,), obj=obj)
+    logger.trace(pickler, "# Dt")
+    return
+# NOTE: the above 'save' performs like:
+#   import copy_reg
+#   def uload(name): return type(NumpyDType(name))
+#   def udump(f): return uload, (f.type,)
+#   copy_reg.pickle(NumpyDTypeType, udump, uload)
+
+def _save_numpy_array(pickler, obj):
+    logger.trace(pickler, "Nu: (%s, %s)", obj.shape, obj.dtype)
+    npdict = getattr(obj, '__dict__', None)
+    f, args, state = obj.__reduce__()
+    pickler.save_reduce(_create_array, (f,args,state,npdict), obj=obj)
+    logger.trace(pickler, "# Nu")
+    return
+
 ### Extend the Picklers
 class Pickler(StockPickler):
     """python's Pickler extended to interpreter sessions"""
@@ -375,45 +477,18 @@ class Pickler(StockPickler):
     def save(self, obj, save_persistent_id=True):
         # numpy hack
         obj_type = type(obj)
-        if NumpyArrayType and not (obj_type is type or obj_type in Pickler.dispatch):
+        if NumpyArrayType and not (obj_type is type or obj_type in Pickler.dispatch) \
+                and _numpy_type(obj_type):
             # register if the object is a numpy ufunc
             # thanks to Paul Kienzle for pointing out ufuncs didn't pickle
             if numpyufunc(obj_type):
-                @register(obj_type)
-                def save_numpy_ufunc(pickler, obj):
-                    logger.trace(pickler, "Nu: %s", obj)
-                    name = getattr(obj, '__qualname__', getattr(obj, '__name__', None))
-                    StockPickler.save_global(pickler, obj, name=name)
-                    logger.trace(pickler, "# Nu")
-                    return
-                # NOTE: the above 'save' performs like:
-                #   import copy_reg
-                #   def udump(f): return f.__name__
-                #   def uload(name): return getattr(numpy, name)
-                #   copy_reg.pickle(NumpyUfuncType, udump, uload)
+                register(obj_type)(_save_numpy_ufunc)
             # register if the object is a numpy dtype
-            if numpydtype(obj_type):
-                @register(obj_type)
-                def save_numpy_dtype(pickler, obj):
-                    logger.trace(pickler, "Dt: %s", obj)
-                    pickler.save_reduce(_create_dtypemeta, (obj.type,), obj=obj)
-                    logger.trace(pickler, "# Dt")
-                    return
-                # NOTE: the above 'save' performs like:
-                #   import copy_reg
-                #   def uload(name): return type(NumpyDType(name))
-                #   def udump(f): return uload, (f.type,)
-                #   copy_reg.pickle(NumpyDTypeType, udump, uload)
+            elif numpydtype(obj_type):
+                register(obj_type)(_save_numpy_dtype)
             # register if the object is a subclassed numpy array instance
-            if ndarraysubclassinstance(obj_type):
-                @register(obj_type)
-                def save_numpy_array(pickler, obj):
-                    logger.trace(pickler, "Nu: (%s, %s)", obj.shape, obj.dtype)
-                    npdict = getattr(obj, '__dict__', None)
-                    f, args, state = obj.__reduce__()
-                    pickler.save_reduce(_create_array, (f,args,state,npdict), obj=obj)
-                    logger.trace(pickler, "# Nu")
-                    return
+            elif ndarraysubclassinstance(obj_type):
+                register(obj_type)(_save_numpy_array)
         # end numpy hack
 
         if GENERATOR_FAIL and obj_type is GeneratorType:
@@ -436,25 +511,34 @@ class Unpickler(StockUnpickler):
     def find_class(self, module, name):
         if (module, name) == ('__builtin__', '__main__'):
             return self._main.__dict__ #XXX: above set w/save_module_dict
-        elif (module, name) == ('__builtin__', 'NoneType'):
-            return type(None) #XXX: special case: NoneType missing
-        if module == 'dill.dill': module = 'dill._dill'
-        return StockUnpickler.find_class(self, module, name)
+        obj = self._find_cache.get((module, name))
+        if obj is not None:
+            return obj
+        if (module, name) == ('__builtin__', 'NoneType'):
+            obj = type(None) #XXX: special case: NoneType missing
+        elif module == 'dill.dill':
+            obj = StockUnpickler.find_class(self, 'dill._dill', name)
+        else:
+            obj = StockUnpickler.find_class(self, module, name)
+        self._find_cache[(module, name)] = obj
+        return obj
 
     def __init__(self, *args, **kwds):
         settings = Pickler.settings
         _ignore = kwds.pop('ignore', None)
         StockUnpickler.__init__(self, *args, **kwds)
         self._main = _main_module
+        self._find_cache = {}
         self._ignore = settings['ignore'] if _ignore is None else _ignore
+        self._main_name = getattr(_main_module, '__name__', '__main__')
 
     def load(self): #NOTE: if settings change, need to update attributes
+        self._find_cache.clear() # modules may have been reloaded since
         obj = StockUnpickler.load(self)
-        if type(obj).__module__ == getattr(_main_module, '__name__', '__main__'):
-            if not self._ignore:
-                # point obj class to main
-                try: obj.__class__ = getattr(self._main, type(obj).__name__)
-                except (AttributeError,TypeError): pass # defined in a file
+        if not self._ignore and type(obj).__module__ == self._main_name:
+            # point obj class to main
+            try: obj.__class__ = getattr(self._main, type(obj).__name__)
+            except (AttributeError,TypeError): pass # defined in a file
        #_main_module.__dict__.update(obj.__dict__) #XXX: should update globals ?
         return obj
     load.__doc__ = StockUnpickler.load.__doc__
@@ -506,14 +590,9 @@ def use_diff(on=True):
         diff = d
 
 def _create_typemap():
-    import types
-    d = dict(list(__builtin__.__dict__.items()) + \
-             list(types.__dict__.items())).items()
-    for key, value in d:
-        if getattr(value, '__module__', None) == 'builtins' \
-                and type(value) is type:
-            yield key, value
-    return
+    d = {**__builtin__.__dict__, **types.__dict__}
+    return ((key, value) for key, value in d.items()
+            if type(value) is type and value.__module__ == 'builtins')
 _reverse_typemap = dict(_create_typemap())
 _reverse_typemap.update({
     'PartialType': PartialType,
@@ -597,22 +676,22 @@ def _unmarshal(string):
 def _load_type(name):
     return _reverse_typemap[name]
 
-def _create_type(typeobj, *args):
+def _create_type(typeobj, *args): # kept to load pickles made with dill < 0.4.0
     return typeobj(*args)
 
 def _create_function(fcode, fglobals, fname=None, fdefaults=None,
                      fclosure=None, fdict=None, fkwdefaults=None):
     # same as FunctionType, but enable passing __dict__ to new function,
     # __dict__ is the storehouse for attributes added after function creation
-    func = FunctionType(fcode, fglobals or dict(), fname, fdefaults, fclosure)
+    fglobals = fglobals or dict()
+    # 'recurse' only stores referenced modules/objects in fglobals,
+    # thus we need to make sure that we have __builtins__ as well
+    fglobals.setdefault("__builtins__", __builtins__)
+    func = FunctionType(fcode, fglobals, fname, fdefaults, fclosure)
     if fdict is not None:
         func.__dict__.update(fdict) #XXX: better copy? option to copy?
     if fkwdefaults is not None:
         func.__kwdefaults__ = fkwdefaults
-    # 'recurse' only stores referenced modules/objects in fglobals,
-    # thus we need to make sure that we have __builtins__ as well
-    if "__builtins__" not in func.__globals__:
-        func.__globals__["__builtins__"] = globals()["__builtins__"]
     # assert id(fglobals) == id(func.__globals__)
     return func
 
@@ -637,6 +716,7 @@ class match:
     >>>     case (x, y, z):
     >>>         # use x, y and z
     """
+    __slots__ = ('value', 'args', '_fields')
     def __init__(self, value):
         self.value = value
         self._fields = None
@@ -676,6 +756,7 @@ for version, new_attr, params in ALL_CODE_PARAMS:
         break
 ENCODE_PARAMS = set(CODE_PARAMS).intersection(
         ['code', 'lnotab', 'linetable', 'endlinetable', 'columntable', 'exceptiontable'])
+ENCODE_INDICES = tuple(i for i, k in enumerate(CODE_PARAMS) if k in ENCODE_PARAMS)
 
 def _create_code(*args):
     if not isinstance(args[0], int): # co_lnotab stored from >= 3.10
@@ -683,6 +764,13 @@ def _create_code(*args):
     else: # from < 3.10 (or pre-LNOTAB storage)
         LNOTAB = b''
 
+    if len(args) == len(CODE_PARAMS): # saved by this version (or 3.8 for 3.10)
+        args = list(args)
+        for i in ENCODE_INDICES:
+            if isinstance(args[i], str):
+                args[i] = args[i].encode()
+        return CodeType(*args)
+
     with match(args) as m:
         # Python 3.11/3.12a (18 members)
         if m.case((
@@ -690,16 +778,6 @@ def _create_code(*args):
             'code', 'consts', 'names', 'varnames', 'filename', 'name', 'qualname', 'firstlineno', # args[6:14]
             'linetable', 'exceptiontable', 'freevars', 'cellvars'                                 # args[14:]
         )):
-            if CODE_VERSION == (3,11):
-                return CodeType(
-                    *args[:6],
-                    args[6].encode() if hasattr(args[6], 'encode') else args[6], # code
-                    *args[7:14],
-                    args[14].encode() if hasattr(args[14], 'encode') else args[14], # linetable
-                    args[15].encode() if hasattr(args[15], 'encode') else args[15], # exceptiontable
-                    args[16],
-                    args[17],
-                )
             fields = m.fields
         # Python 3.10 or 3.8/3.9 (16 members)
         elif m.case((
@@ -707,15 +785,6 @@ def _create_code(*args):
             'code', 'consts', 'names', 'varnames', 'filename', 'name', 'firstlineno',         # args[6:13]
             'LNOTAB_OR_LINETABLE', 'freevars', 'cellvars'                                     # args[13:]
         )):
-            if CODE_VERSION == (3,10) or CODE_VERSION == (3,8):
-                return CodeType(
-                    *args[:6],
-                    args[6].encode() if hasattr(args[6], 'encode') else args[6], # code
-                    *args[7:13],
-                    args[13].encode() if hasattr(args[13], 'encode') else args[13], # lnotab/linetable
-                    args[14],
-                    args[15],
-                )
             fields = m.fields
             if CODE_VERSION >= (3,10):
                 fields['linetable'] = m.LNOTAB_OR_LINETABLE
@@ -727,15 +796,6 @@ def _create_code(*args):
             'code', 'consts', 'names', 'varnames', 'filename', 'name', 'firstlineno', # args[5:12]
             'lnotab', 'freevars', 'cellvars'                                          # args[12:]
         )):
-            if CODE_VERSION == (3,7):
-                return CodeType(
-                    *args[:5],
-                    args[5].encode() if hasattr(args[5], 'encode') else args[5], # code
-                    *args[6:12],
-                    args[12].encode() if hasattr(args[12], 'encode') else args[12], # lnotab
-                    args[13],
-                    args[14],
-                )
             fields = m.fields
         # Python 3.11a (20 members)
         elif m.case((
@@ -743,15 +803,6 @@ def _create_code(*args):
             'code', 'consts', 'names', 'varnames', 'filename', 'name', 'qualname', 'firstlineno', # args[6:14]
             'linetable', 'endlinetable', 'columntable', 'exceptiontable', 'freevars', 'cellvars'  # args[14:]
         )):
-            if CODE_VERSION == (3,11,'a'):
-                return CodeType(
-                    *args[:6],
-                    args[6].encode() if hasattr(args[6], 'encode') else args[6], # code
-                    *args[7:14],
-                    *(a.encode() if hasattr(a, 'encode') else a for a in args[14:18]), # linetable-exceptiontable
-                    args[18],
-                    args[19],
-                )
             fields = m.fields
         else:
             raise UnpicklingError("pattern match for code object failed")
@@ -765,8 +816,10 @@ def _create_code(*args):
     fields.setdefault('endlinetable', None)         # from python != 3.11a
     fields.setdefault('columntable', None)          # from python != 3.11a
 
-    args = (fields[k].encode() if k in ENCODE_PARAMS and hasattr(fields[k], 'encode') else fields[k]
-            for k in CODE_PARAMS)
+    args = [fields[k] for k in CODE_PARAMS]
+    for i in ENCODE_INDICES:
+        if isinstance(args[i], str):
+            args[i] = args[i].encode()
     return CodeType(*args)
 
 def _create_ftype(ftypeobj, func, args, kwds):
@@ -814,7 +867,7 @@ def _create_filehandle(name, mode, position, closed, open, strictio, fmode, fdat
     # NOTE: handle special cases first (are there more special cases?)
     names = {'<stdin>':sys.__stdin__, '<stdout>':sys.__stdout__,
              '<stderr>':sys.__stderr__} #XXX: better fileno=(0,1,2) ?
-    if name in list(names.keys()):
+    if name in names:
         f = names[name] #XXX: safer "f=sys.stdin"
     elif name == '<tmpfile>':
         f = os.tmpfile()
@@ -894,6 +947,7 @@ def _create_stringo(value, position, closed):
     return f
 
 class _itemgetter_helper(object):
+    __slots__ = ('items',)
     def __init__(self):
         self.items = []
     def __getitem__(self, item):
@@ -901,6 +955,7 @@ class _itemgetter_helper(object):
         return
 
 class _attrgetter_helper(object):
+    __slots__ = ('attrs', 'index')
     def __init__(self, attrs, index=None):
         self.attrs = attrs
         self.index = index
@@ -938,10 +993,18 @@ del __d
 _CELL_REF = None
 _CELL_EMPTY = Sentinel('_CELL_EMPTY')
 
-def _create_cell(contents=None):
-    if contents is not _CELL_EMPTY:
-        value = contents
-    return (lambda: value).__closure__[0]
+try: # cells can be built directly on python >= 3.8 (not on all implementations)
+    CellType(); CellType(None)
+except TypeError:
+    def _create_cell(contents=None):
+        if contents is not _CELL_EMPTY:
+            value = contents
+        return (lambda: value).__closure__[0]
+else:
+    def _create_cell(contents=None):
+        if contents is not _CELL_EMPTY:
+            return CellType(contents)
+        return CellType()
 
 def _create_weakref(obj, *args):
     from weakref import ref
@@ -1037,15 +1100,23 @@ def _import_module(import_name, safe=False):
     try:
         if import_name.startswith('__runtime__.'):
             return sys.modules[import_name]
+        # modules already in sys.modules are taken from there, as __import__ would
         elif '.' in import_name:
-            items = import_name.split('.')
-            module = '.'.join(items[:-1])
-            obj = items[-1]
-            submodule = getattr(__import__(module, None, None, [obj]), obj)
+            module, _, obj = import_name.rpartition('.')
+            parent = sys.modules.get(module)
+            if parent is None or not hasattr(parent, obj):
+                parent = __import__(module, None, None, [obj])
+            submodule = getattr(parent, obj)
             if isinstance(submodule, (ModuleType, type)):
                 return submodule
+            submodule = sys.modules.get(import_name)
+            if submodule is not None:
+                return submodule
             return __import__(import_name, None, None, [obj])
         else:
+            module = sys.modules.get(import_name)
+            if module is not None:
+                return module
             return __import__(import_name)
     except (ImportError, AttributeError, KeyError):
         if safe:
@@ -1071,10 +1142,16 @@ def _locate_function(obj, pickler=None):
     if module_name in ['__main__', None] or \
             pickler and is_dill(pickler, child=False) and pickler._session and module_name == pickler._main.__name__:
         return False
-    if hasattr(obj, '__qualname__'):
-        module = _import_module(module_name, safe=True)
+    qualname = getattr(obj, '__qualname__', None)
+    if qualname is not None:
+        if '<locals>' in qualname: # can't be found by name, as _getattribute would say
+            return False
+        # sys.modules is the cache of imported modules; only import on a miss
+        module = sys.modules.get(module_name)
+        if module is None:
+            module = _import_module(module_name, safe=True)
         try:
-            found, _ = _getattribute(module, obj.__qualname__)
+            found, _ = _getattribute(module, qualname)
             return found is obj
         except AttributeError:
             return False
@@ -1093,7 +1170,8 @@ def _save_with_postproc(pickler, reduction, is_pickler_dill=None, obj=Getattr.NO
         obj = Reduce(reduction) # pragma: no cover
 
     if is_pickler_dill is None:
-        is_pickler_dill = is_dill(pickler, child=True)
+        is_pickler_dill = isinstance(pickler, Pickler)
+    pid = id(obj)
     if is_pickler_dill:
         # assert id(obj) not in pickler._postproc, str(obj) + ' already pushed on stack!'
         # if not hasattr(pickler, 'x'): pickler.x = 0
@@ -1103,12 +1181,12 @@ def _save_with_postproc(pickler, reduction, is_pickler_dill=None, obj=Getattr.NO
             postproc_list = []
 
         # Recursive object not supported. Default to a global instead.
-        if id(obj) in pickler._postproc:
+        if pid in pickler._postproc:
             name = '%s.%s ' % (obj.__module__, getattr(obj, '__qualname__', obj.__name__)) if hasattr(obj, '__module__') else ''
             warnings.warn('Cannot pickle %r: %shas recursive self-references that trigger a RecursionError.' % (obj, name), PicklingWarning)
             pickler.save_global(obj)
             return
-        pickler._postproc[id(obj)] = postproc_list
+        pickler._postproc[pid] = postproc_list
 
     # TODO: Use state_setter in Python 3.8 to allow for faster cPickle implementations
     pickler.save_reduce(*reduction, obj=obj)
@@ -1116,7 +1194,7 @@ def _save_with_postproc(pickler, reduction, is_pickler_dill=None, obj=Getattr.NO
     if is_pickler_dill:
         # pickler.x -= 1
         # print(pickler.x*' ', 'pop', obj, id(obj))
-        postproc = pickler._postproc.pop(id(obj))
+        postproc = pickler._postproc.pop(pid)
         # assert postproc_list == postproc, 'Stack tampered!'
         for reduction in reversed(postproc):
             if reduction[0] is _setitems:
@@ -1148,89 +1226,94 @@ def _save_with_postproc(pickler, reduction, is_pickler_dill=None, obj=Getattr.NO
 # Copyright (c) 2012, Regents of the University of California.
 # Copyright (c) 2009 `PiCloud, Inc. <http://www.picloud.com>`_.
 # License: https://github.com/cloudpipe/cloudpickle/blob/master/LICENSE
+# the code attributes saved for each version of python, in _create_code's order
+if hasattr(CodeType, "co_endlinetable"): # python 3.11a (20 args)
+    _code_args = attrgetter(
+        'co_lnotab', # for < python 3.10 [not counted in args]
+        'co_argcount', 'co_posonlyargcount',
+        'co_kwonlyargcount', 'co_nlocals', 'co_stacksize',
+        'co_flags', 'co_code', 'co_consts', 'co_names',
+        'co_varnames', 'co_filename', 'co_name', 'co_qualname',
+        'co_firstlineno', 'co_linetable', 'co_endlinetable',
+        'co_columntable', 'co_exceptiontable', 'co_freevars',
+        'co_cellvars'
+    )
+elif hasattr(CodeType, "co_exceptiontable"): # python 3.11 (18 args)
+    _code_args = attrgetter(
+        'co_lnotab', # for < python 3.10 [not counted in args]
+        'co_argcount', 'co_posonlyargcount',
+        'co_kwonlyargcount', 'co_nlocals', 'co_stacksize',
+        'co_flags', 'co_code', 'co_consts', 'co_names',
+        'co_varnames', 'co_filename', 'co_name', 'co_qualname',
+        'co_firstlineno', 'co_linetable', 'co_exceptiontable',
+        'co_freevars', 'co_cellvars'
+    )
+elif hasattr(CodeType, "co_linetable"): # python 3.10 (16 args)
+    _code_args = attrgetter(
+        'co_lnotab', # for < python 3.10 [not counted in args]
+        'co_argcount', 'co_posonlyargcount',
+        'co_kwonlyargcount', 'co_nlocals', 'co_stacksize',
+        'co_flags', 'co_code', 'co_consts', 'co_names',
+        'co_varnames', 'co_filename', 'co_name',
+        'co_firstlineno', 'co_linetable', 'co_freevars',
+        'co_cellvars'
+    )
+elif hasattr(CodeType, "co_posonlyargcount"): # python 3.8 (16 args)
+    _code_args = attrgetter(
+        'co_argcount', 'co_posonlyargcount',
+        'co_kwonlyargcount', 'co_nlocals', 'co_stacksize',
+        'co_flags', 'co_code', 'co_consts', 'co_names',
+        'co_varnames', 'co_filename', 'co_name',
+        'co_firstlineno', 'co_lnotab', 'co_freevars',
+        'co_cellvars'
+    )
+else: # python 3.7 (15 args)
+    _code_args = attrgetter(
+        'co_argcount', 'co_kwonlyargcount', 'co_nlocals',
+        'co_stacksize', 'co_flags', 'co_code', 'co_consts',
+        'co_names', 'co_varnames', 'co_filename',
+        'co_name', 'co_firstlineno', 'co_lnotab',
+        'co_freevars', 'co_cellvars'
+    )
+
 @register(CodeType)
 def save_code(pickler, obj):
     logger.trace(pickler, "Co: %s", obj)
-    if hasattr(obj, "co_endlinetable"): # python 3.11a (20 args)
-        args = (
-            obj.co_lnotab, # for < python 3.10 [not counted in args]
-            obj.co_argcount, obj.co_posonlyargcount,
-            obj.co_kwonlyargcount, obj.co_nlocals, obj.co_stacksize,
-            obj.co_flags, obj.co_code, obj.co_consts, obj.co_names,
-            obj.co_varnames, obj.co_filename, obj.co_name, obj.co_qualname,
-            obj.co_firstlineno, obj.co_linetable, obj.co_endlinetable,
-            obj.co_columntable, obj.co_exceptiontable, obj.co_freevars,
-            obj.co_cellvars
-        )
-    elif hasattr(obj, "co_exceptiontable"): # python 3.11 (18 args)
+    if OLD312a7:
+        args = _code_args(obj)
+    else: # co_lnotab is deprecated
         with warnings.catch_warnings():
-            if not OLD312a7: # issue 597
-                warnings.filterwarnings('ignore', category=DeprecationWarning)
-            args = (
-                obj.co_lnotab, # for < python 3.10 [not counted in args]
-                obj.co_argcount, obj.co_posonlyargcount,
-                obj.co_kwonlyargcount, obj.co_nlocals, obj.co_stacksize,
-                obj.co_flags, obj.co_code, obj.co_consts, obj.co_names,
-                obj.co_varnames, obj.co_filename, obj.co_name, obj.co_qualname,
-                obj.co_firstlineno, obj.co_linetable, obj.co_exceptiontable,
-                obj.co_freevars, obj.co_cellvars
-            )
-    elif hasattr(obj, "co_linetable"): # python 3.10 (16 args)
-        args = (
-            obj.co_lnotab, # for < python 3.10 [not counted in args]
-            obj.co_argcount, obj.co_posonlyargcount,
-            obj.co_kwonlyargcount, obj.co_nlocals, obj.co_stacksize,
-            obj.co_flags, obj.co_code, obj.co_consts, obj.co_names,
-            obj.co_varnames, obj.co_filename, obj.co_name,
-            obj.co_firstlineno, obj.co_linetable, obj.co_freevars,
-            obj.co_cellvars
-        )
-    elif hasattr(obj, "co_posonlyargcount"): # python 3.8 (16 args)
-        args = (
-            obj.co_argcount, obj.co_posonlyargcount,
-            obj.co_kwonlyargcount, obj.co_nlocals, obj.co_stacksize,
-            obj.co_flags, obj.co_code, obj.co_consts, obj.co_names,
-            obj.co_varnames, obj.co_filename, obj.co_name,
-            obj.co_firstlineno, obj.co_lnotab, obj.co_freevars,
-            obj.co_cellvars
-        )
-    else: # python 3.7 (15 args)
-        args = (
-            obj.co_argcount, obj.co_kwonlyargcount, obj.co_nlocals,
-            obj.co_stacksize, obj.co_flags, obj.co_code, obj.co_consts,
-            obj.co_names, obj.co_varnames, obj.co_filename,
-            obj.co_name, obj.co_firstlineno, obj.co_lnotab,
-            obj.co_freevars, obj.co_cellvars
-        )
+            warnings.filterwarnings('ignore', category=DeprecationWarning) # issue 597
+            args = _code_args(obj)
 
     pickler.save_reduce(_create_code, args, obj=obj)
     logger.trace(pickler, "# Co")
     return
 
-def _repr_dict(obj):
-    """Make a short string representation of a dictionary."""
-    return "<%s object at %#012x>" % (type(obj).__name__, id(obj))
+# trace message for dicts, formatted from (tag, type name, id) only when tracing
+_DICT_TRACE = "%s: <%s object at %#012x>"
 
 @register(dict)
 def save_module_dict(pickler, obj):
-    if is_dill(pickler, child=False) and obj == pickler._main.__dict__ and \
+    pickler_is_dill = is_dill(pickler, child=False)
+    if pickler_is_dill and obj is pickler._main.__dict__ and \
             not (pickler._session and pickler._first_pass):
-        logger.trace(pickler, "D1: %s", _repr_dict(obj)) # obj
-        pickler.write(bytes('c__builtin__\n__main__\n', 'UTF-8'))
+        logger.trace(pickler, _DICT_TRACE, "D1", type(obj).__name__, id(obj)) # obj
+        pickler.write(GLOBAL + b'__builtin__\n__main__\n')
         logger.trace(pickler, "# D1")
-    elif (not is_dill(pickler, child=False)) and (obj == _main_module.__dict__):
-        logger.trace(pickler, "D3: %s", _repr_dict(obj)) # obj
-        pickler.write(bytes('c__main__\n__dict__\n', 'UTF-8'))  #XXX: works in general?
+    elif (not pickler_is_dill) and (obj is _main_module.__dict__):
+        logger.trace(pickler, _DICT_TRACE, "D3", type(obj).__name__, id(obj)) # obj
+        pickler.write(GLOBAL + b'__main__\n__dict__\n')  #XXX: works in general?
         logger.trace(pickler, "# D3")
-    elif '__name__' in obj and obj != _main_module.__dict__ \
+    elif '__name__' in obj and obj is not _main_module.__dict__ \
             and type(obj['__name__']) is str \
             and obj is getattr(_import_module(obj['__name__'],True), '__dict__', None):
-        logger.trace(pickler, "D4: %s", _repr_dict(obj)) # obj
-        pickler.write(bytes('c%s\n__dict__\n' % obj['__name__'], 'UTF-8'))
+        logger.trace(pickler, _DICT_TRACE, "D4", type(obj).__name__, id(obj)) # obj
+        pickler.write(GLOBAL + obj['__name__'].encode() + b'\n__dict__\n')
         logger.trace(pickler, "# D4")
     else:
-        logger.trace(pickler, "D2: %s", _repr_dict(obj)) # obj
-        if is_dill(pickler, child=False) and pickler._session:
+        logger.trace(pickler, _DICT_TRACE, "D2", type(obj).__name__, id(obj)) # obj
+        if pickler_is_dill and pickler._session:
             # we only care about session the first pass thru
             pickler._first_pass = False
         StockPickler.save_dict(pickler, obj)
@@ -1343,9 +1426,13 @@ def save_lock(pickler, obj):
 @register(RLockType)
 def save_rlock(pickler, obj):
     logger.trace(pickler, "RL: %s", obj)
-    r = obj.__repr__() # don't use _release_save as it unlocks the lock
-    count = int(r.split('count=')[1].split()[0].rstrip('>'))
-    owner = int(r.split('owner=')[1].split()[0])
+    if RLOCK_COUNT and obj._is_owned(): # held by this thread
+        count = obj._recursion_count()
+        owner = get_ident()
+    else:
+        r = obj.__repr__() # don't use _release_save as it unlocks the lock
+        count = int(r.split('count=')[1].split()[0].rstrip('>'))
+        owner = int(r.split('owner=')[1].split()[0])
     pickler.save_reduce(_create_rlock, (count,owner,), obj=obj)
     logger.trace(pickler, "# RL")
     return
@@ -1366,13 +1453,14 @@ def _save_file(pickler, obj, open_):
             position = -1
         else:
             position = obj.tell()
-    if is_dill(pickler, child=True) and pickler._fmode == FILE_FMODE:
+    pickler_is_dill = is_dill(pickler, child=True)
+    if pickler_is_dill and pickler._fmode == FILE_FMODE:
         f = open_(obj.name, "r")
         fdata = f.read()
         f.close()
     else:
         fdata = ""
-    if is_dill(pickler, child=True):
+    if pickler_is_dill:
         strictio = pickler._strictio
         fmode = pickler._fmode
     else:
@@ -1451,7 +1539,6 @@ if InputType:
         return
 
 if LRUCacheType is not None:
-    from functools import lru_cache
     @register(LRUCacheType)
     def save_lru_cache(pickler, obj):
         logger.trace(pickler, "LRU: %s", obj)
@@ -1571,7 +1658,7 @@ def save_cell(pickler, obj):
 if MAPPING_PROXY_TRICK:
     @register(DictProxyType)
     def save_dictproxy(pickler, obj):
-        logger.trace(pickler, "Mp: %s", _repr_dict(obj)) # obj
+        logger.trace(pickler, _DICT_TRACE, "Mp", type(obj).__name__, id(obj)) # obj
         mapping = obj | _dictproxy_helper_instance
         pickler.save_reduce(DictProxyType, (mapping,), obj=obj)
         logger.trace(pickler, "# Mp")
@@ -1579,7 +1666,7 @@ if MAPPING_PROXY_TRICK:
 else:
     @register(DictProxyType)
     def save_dictproxy(pickler, obj):
-        logger.trace(pickler, "Mp: %s", _repr_dict(obj)) # obj
+        logger.trace(pickler, _DICT_TRACE, "Mp", type(obj).__name__, id(obj)) # obj
         pickler.save_reduce(DictProxyType, (obj.copy(),), obj=obj)
         logger.trace(pickler, "# Mp")
         return
@@ -1637,6 +1724,17 @@ def _locate_object(address, module=None):
         raise TypeError("'%s' is not a valid memory address" % str(address))
     raise ReferenceError("Cannot reference object at '%s'" % address)
 
+def _proxy_referent(obj):
+    """get the object referenced by a proxy, avoiding a search of all objects"""
+    address = _proxy_helper(obj)
+    try: # a live proxy passes attribute access on to its referent
+        refobj = obj.__repr__.__self__
+    except Exception: # dead proxy, or the referent's own __getattribute__
+        pass
+    else:
+        if id(refobj) == address: return refobj
+    return _locate_object(address)
+
 @register(ReferenceType)
 def save_weakref(pickler, obj):
     refobj = obj()
@@ -1651,33 +1749,39 @@ def save_weakref(pickler, obj):
 def save_weakproxy(pickler, obj):
     # Must do string substitution here and use %r to avoid ReferenceError.
     logger.trace(pickler, "R2: %r" % obj)
-    refobj = _locate_object(_proxy_helper(obj))
+    refobj = _proxy_referent(obj)
     pickler.save_reduce(_create_weakproxy, (refobj, callable(obj)), obj=obj)
     logger.trace(pickler, "# R2")
     return
 
+_SYS_PREFIX_NAMES = ("base_prefix", "base_exec_prefix", "exec_prefix", "prefix", "real_prefix")
+
 def _is_builtin_module(module):
     if not hasattr(module, "__file__"): return True
     if module.__file__ is None: return False
+    prefixes = tuple(getattr(sys, name) for name in _SYS_PREFIX_NAMES if hasattr(sys, name))
+    return _is_builtin_file(module.__file__, prefixes)
+
+@lru_cache(maxsize=1024) # realpath() makes system calls
+def _is_builtin_file(filename, prefixes):
     # If a module file name starts with prefix, it should be a builtin
     # module, so should always be pickled as a reference.
-    names = ["base_prefix", "base_exec_prefix", "exec_prefix", "prefix", "real_prefix"]
+    if filename.startswith(prefixes):
+        return True
     rp = os.path.realpath
     # See https://github.com/uqfoundation/dill/issues/566
     return (
-        any(
-            module.__file__.startswith(getattr(sys, name))
-            or rp(module.__file__).startswith(rp(getattr(sys, name)))
-            for name in names
-            if hasattr(sys, name)
-        )
-        or module.__file__.endswith(EXTENSION_SUFFIXES)
-        or 'site-packages' in module.__file__
+        rp(filename).startswith(tuple(rp(prefix) for prefix in prefixes))
+        or filename.endswith(EXTENSION_SUFFIXES)
+        or 'site-packages' in filename
     )
 
 def _is_imported_module(module):
     return getattr(module, '__loader__', None) is not None or module in sys.modules.values()
 
+# module attributes that save_module doesn't save
+_MODULE_SKIP_NAMES = frozenset(('__builtins__', '__loader__'))
+
 @register(ModuleType)
 def save_module(pickler, obj):
     if False: #_use_diff:
@@ -1706,9 +1810,8 @@ def save_module(pickler, obj):
             # Hack for handling module-type objects in load_module().
             mod_name = obj.__name__ if _is_imported_module(obj) else '__runtime__.%s' % obj.__name__
             # Second references are saved as __builtin__.__main__ in save_module_dict().
-            main_dict = obj.__dict__.copy()
-            for item in ('__builtins__', '__loader__'):
-                main_dict.pop(item, None)
+            main_dict = {k: v for k, v in obj.__dict__.items()
+                         if k not in _MODULE_SKIP_NAMES}
             for item in IPYTHON_SINGLETONS: #pragma: no cover
                 if getattr(main_dict.get(item), '__module__', '').startswith('IPython'):
                     del main_dict[item]
@@ -1736,21 +1839,15 @@ def _get_typedict_type(cls, clsdict, attrs, postproc_list):
         inherited_dict = {}
         for base in reversed(cls.__bases__):
             inherited_dict.update(base.__dict__)
-    to_remove = []
-    for name, value in dict.items(clsdict):
-        try:
-            base_value = inherited_dict[name]
-            if value is base_value and hasattr(value, '__qualname__'):
-                to_remove.append(name)
-        except KeyError:
-            pass
-    for name in to_remove:
-        dict.pop(clsdict, name)
-
     if issubclass(type(cls), type):
-        clsdict.pop('__dict__', None)
-        clsdict.pop('__weakref__', None)
-        # clsdict.pop('__prepare__', None)
+        skip = ('__dict__', '__weakref__') # '__prepare__'
+    else:
+        skip = ()
+    # build the copy in one pass, dropping inherited methods and skipped keys
+    clsdict = {
+        name: value for name, value in clsdict.items() if name not in skip
+        and not (value is inherited_dict.get(name) and hasattr(value, '__qualname__'))
+    }
     return clsdict, attrs
 
 def _get_typedict_abc(obj, _dict, attrs, postproc_list):
@@ -1776,11 +1873,12 @@ def _get_typedict_abc(obj, _dict, attrs, postproc_list):
 
 @register(TypeType)
 def save_type(pickler, obj, postproc_list=None):
-    if obj in _typemap:
+    type_name = _typemap.get(obj)
+    if type_name is not None:
         logger.trace(pickler, "T1: %s", obj)
         # if obj in _incedental_types:
         #     warnings.warn('Type %r may only exist on this implementation of Python and cannot be unpickled in other implementations.' % (obj,), PicklingWarning)
-        pickler.save_reduce(_load_type, (_typemap[obj],), obj=obj)
+        pickler.save_reduce(_load_type, (type_name,), obj=obj)
         logger.trace(pickler, "# T1")
     elif obj.__bases__ == (tuple,) and all([hasattr(obj, attr) for attr in ('_fields','_asdict','_make','_replace')]):
         # special case: namedtuples
@@ -1833,7 +1931,7 @@ def save_type(pickler, obj, postproc_list=None):
 
             # thanks to Tom Stepleton pointing out pickler._session unneeded
             logger.trace(pickler, "T2: %s", obj)
-            _dict, attrs = _get_typedict_type(obj, obj.__dict__.copy(), None, postproc_list) # copy dict proxy to a dict
+            _dict, attrs = _get_typedict_type(obj, obj.__dict__, None, postproc_list) # copies dict proxy to a dict
 
            #print (_dict)
            #print ("%s\n%s" % (type(obj), obj.__name__))
@@ -1860,8 +1958,8 @@ def save_type(pickler, obj, postproc_list=None):
                 postproc_list.append((setattr, (obj, '__qualname__', qualname)))
 
             if not hasattr(obj, '__orig_bases__'):
-                _save_with_postproc(pickler, (_create_type, (
-                    type(obj), obj.__name__, obj.__bases__, _dict
+                _save_with_postproc(pickler, (type(obj), (
+                    obj.__name__, obj.__bases__, _dict
                 )), obj=obj, postproc_list=postproc_list)
             else:
                 # This case will always work, but might be overkill.
@@ -2212,16 +2310,15 @@ def is_dill(pickler, child=None):
     "check the dill-ness of your pickler"
     if child is False or not hasattr(pickler.__class__, 'mro'):
         return 'dill' in pickler.__module__
-    return Pickler in pickler.__class__.mro()
+    return Pickler in pickler.__class__.__mro__
+
+# the functions that pickle the types of _is_plain_data, as registered above
+_plain_dispatch = {t: Pickler.dispatch.get(t) for t in (*_PLAIN_ATOMS, *_PLAIN_CONTAINERS)}
 
 def _extend():
     """extend pickle with all of dill's registered types"""
     # need to have pickle not choke on _main_module?  use is_dill(pickler)
-    for t,func in Pickler.dispatch.items():
-        try:
-            StockPickler.dispatch[t] = func
-        except Exception: #TypeError, PicklingError, UnpicklingError
-            logger.trace(pickler, "skip: %s", t)
+    StockPickler.dispatch.update(Pickler.dispatch)
     return
 
 del diff, _use_diff, use_diff
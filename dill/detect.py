@@ -10,6 +10,8 @@ Methods for detecting objects leading to pickling failures.
 """
 
 import dis
+import builtins
+from functools import lru_cache
 from inspect import ismethod, isfunction, istraceback, isframe, iscode
 
 from .pointers import parent, reference, at, parents, children
@@ -136,10 +138,9 @@ def freevars(func):
     return dict(get_cell_contents())
 
 # thanks to Davies Liu for recursion of globals
-def nestedglobals(func, recurse=True):
-    """get the names of any globals found within func"""
-    func = code(func)
-    if func is None: return list()
+@lru_cache(maxsize=1024)
+def _nestedglobals(func, recurse):
+    """get the names of any globals found within a code object (cached)"""
     import sys
     from .temp import capture
     CAN_NULL = sys.hexversion >= 0x30b00a7 # NULL may be prepended >= 3.11a7
@@ -155,8 +156,15 @@ def nestedglobals(func, recurse=True):
                 names.add(name)
     for co in getattr(func, 'co_consts', tuple()):
         if co and recurse and iscode(co):
-            names.update(nestedglobals(co, recurse=True))
-    return list(names)
+            names.update(_nestedglobals(co, True))
+    return frozenset(names)
+
+def nestedglobals(func, recurse=True):
+    """get the names of any globals found within func"""
+    func = code(func)
+    if func is None: return list()
+    # code objects are immutable, so the names are cached per code object
+    return list(_nestedglobals(func, bool(recurse)))
 
 def referredglobals(func, recurse=True, builtin=False):
     """get the names of objects in the global scope referred to by func"""
@@ -168,7 +176,7 @@ def globalvars(func, recurse=True, builtin=False):
     return a dict of {name:object}"""
     if ismethod(func): func = func.__func__
     if isfunction(func):
-        globs = vars(getmodule(sum)).copy() if builtin else {}
+        globs = vars(builtins).copy() if builtin else {}
         # get references from within closure
         orig_func, func = func, set()
         for obj in orig_func.__closure__ or {}:
@@ -195,7 +203,7 @@ def globalvars(func, recurse=True, builtin=False):
                     continue  #XXX: globalvars(func, False)?
                 func.update(globalvars(nested_func, True, builtin))
     elif iscode(func):
-        globs = vars(getmodule(sum)).copy() if builtin else {}
+        globs = vars(builtins).copy() if builtin else {}
        #globs.update(globals())
         if not recurse:
             func = func.co_names # get names
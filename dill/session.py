@@ -19,10 +19,24 @@ import re
 import os
 import sys
 import warnings
-import pathlib
-import tempfile
 
-TEMPDIR = pathlib.PurePath(tempfile.gettempdir())
+def __getattr__(name):
+    # TEMPDIR is computed on first use, to keep pathlib and tempfile out of import
+    if name == 'TEMPDIR':
+        global TEMPDIR
+        import pathlib
+        import tempfile
+        TEMPDIR = pathlib.PurePath(tempfile.gettempdir())
+        return TEMPDIR
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+def _default_filename():
+    """get the default session file, in TEMPDIR if it has been set"""
+    tempdir = globals().get('TEMPDIR')
+    if tempdir is None:
+        import tempfile
+        tempdir = tempfile.gettempdir()
+    return os.path.join(tempdir, 'session.pkl')
 
 # Type hints.
 from typing import Optional, Union
@@ -43,11 +57,17 @@ def _module_map():
         by_id=defaultdict(list),
         top_level={},
     )
+    seen = set()
     for modname, module in sys.modules.items():
         if modname in ('__main__', '__mp_main__') or not isinstance(module, ModuleType):
             continue
         if '.' not in modname:
             modmap.top_level[id(module)] = modname
+        # a module aliased under another name (e.g. os.path and posixpath)
+        # would only add entries after the ones of its first name
+        if id(module) in seen:
+            continue
+        seen.add(id(module))
         for objname, modobj in module.__dict__.items():
             modmap.by_name[objname].append((modobj, modname))
             modmap.by_id[id(modobj)].append((modobj, objname, modname))
@@ -81,13 +101,15 @@ def _stash_modules(main_module):
     imported_as = []
     imported_top_level = []  # keep separated for backward compatibility
     original = {}
-    for name, obj in main_module.__dict__.items():
+    main_dict = main_module.__dict__
+    top_level = modmap.top_level
+    for name, obj in main_dict.items():
         if obj is main_module:
             original[name] = newmod  # self-reference
-        elif obj is main_module.__dict__:
+        elif obj is main_dict:
             original[name] = newmod.__dict__
         # Avoid incorrectly matching a singleton value in another package (ex.: __doc__).
-        elif any(obj is singleton for singleton in (None, False, True)) \
+        elif obj is None or obj is False or obj is True \
                 or isinstance(obj, ModuleType) and _is_builtin_module(obj):  # always saved by ref
             original[name] = obj
         else:
@@ -99,11 +121,11 @@ def _stash_modules(main_module):
                     imported_as.append((source_module, objname, name))
             else:
                 try:
-                    imported_top_level.append((modmap.top_level[id(obj)], name))
+                    imported_top_level.append((top_level[id(obj)], name))
                 except KeyError:
                     original[name] = obj
 
-    if len(original) < len(main_module.__dict__):
+    if len(original) < len(main_dict):
         newmod.__dict__.update(original)
         newmod.__dill_imported = imported
         newmod.__dill_imported_as = imported_as
@@ -150,7 +172,9 @@ def dump_module(
             similar but independent from ``dill.settings[`byref`]``, as
             ``refimported`` refers to virtually all imported objects, while
             ``byref`` only affects select objects.
-        **kwds: extra keyword arguments passed to :py:class:`Pickler()`.
+        **kwds: extra keyword arguments passed to :py:class:`Pickler()`, such
+            as ``protocol`` (the default is ``dill.settings['protocol']``) or
+            ``buffer_callback`` (for out-of-band buffers with protocol 5).
 
     Raises:
        :py:exc:`PicklingError`: if pickling fails.
@@ -229,7 +253,9 @@ def dump_module(
     module = kwds.pop('main', module)
 
     from .settings import settings
-    protocol = settings['protocol']
+    protocol = kwds.pop('protocol', None)
+    if protocol is None:
+        protocol = settings['protocol']
     main = module
     if main is None:
         main = _main_module
@@ -241,19 +267,21 @@ def dump_module(
         file = filename
     else:
         if filename is None:
-            filename = str(TEMPDIR/'session.pkl')
+            filename = _default_filename()
         file = open(filename, 'wb')
     try:
         pickler = Pickler(file, protocol, **kwds)
         pickler._original_main = main
         if refimported:
             main = _stash_modules(main)
-        pickler._main = main     #FIXME: dill.settings are disabled
-        pickler._byref = False   # disable pickling by name reference
-        pickler._recurse = False # disable pickling recursion for globals
-        pickler._session = True  # is best indicator of when pickling a session
-        pickler._first_pass = True
-        pickler._main_modified = main is not pickler._original_main
+        vars(pickler).update(
+            _main=main,     #FIXME: dill.settings are disabled
+            _byref=False,   # disable pickling by name reference
+            _recurse=False, # disable pickling recursion for globals
+            _session=True,  # is best indicator of when pickling a session
+            _first_pass=True,
+            _main_modified=main is not pickler._original_main,
+        )
         pickler.dump(main)
     finally:
         if file is not filename:  # if newly opened file
@@ -268,27 +296,51 @@ dump_session.__doc__ = dump_module.__doc__
 
 class _PeekableReader:
     """lightweight stream wrapper that implements peek()"""
+    __slots__ = ('stream', 'buffer')
     def __init__(self, stream):
         self.stream = stream
-    def read(self, n):
-        return self.stream.read(n)
+        self.buffer = b'' # peeked bytes, not read yet
+    def read(self, n=-1):
+        buffer = self.buffer
+        if not buffer:
+            return self.stream.read(n)
+        if 0 <= n <= len(buffer):
+            self.buffer = buffer[n:]
+            return buffer[:n]
+        self.buffer = b''
+        return buffer + self.stream.read(n - len(buffer) if n > 0 else -1)
     def readline(self):
-        return self.stream.readline()
+        buffer = self.buffer
+        if not buffer:
+            return self.stream.readline()
+        end = buffer.find(b'\n') + 1
+        if end:
+            self.buffer = buffer[end:]
+            return buffer[:end]
+        self.buffer = b''
+        return buffer + self.stream.readline()
     def tell(self):
-        return self.stream.tell()
+        return self.stream.tell() - len(self.buffer)
     def close(self):
         return self.stream.close()
     def peek(self, n):
-        stream = self.stream
-        try:
-            if hasattr(stream, 'flush'): stream.flush()
-            position = stream.tell()
-            stream.seek(position)  # assert seek() works before reading
-            chunk = stream.read(n)
-            stream.seek(position)
-            return chunk
-        except (AttributeError, OSError):
-            raise NotImplementedError("stream is not peekable: %r", stream) from None
+        buffer = self.buffer
+        if len(buffer) < n:
+            stream = self.stream
+            try:
+                if not buffer:
+                    if hasattr(stream, 'flush'): stream.flush()
+                    stream.seek(stream.tell())  # assert seek() works before reading
+                self.buffer = buffer = buffer + stream.read(n - len(buffer))
+            except (AttributeError, OSError):
+                raise NotImplementedError("stream is not peekable: %r", stream) from None
+        return buffer[:n]
+    def unread(self):
+        """move the stream back to the first byte not read yet"""
+        if self.buffer:
+            stream = self.stream
+            stream.seek(stream.tell() - len(self.buffer))
+            self.buffer = b''
 
 def _make_peekable(stream):
     """return stream as an object with a peek() method"""
@@ -302,8 +354,36 @@ def _make_peekable(stream):
             pass
     return _PeekableReader(stream)
 
+# opcodes that may sit between _import_module and the module name, and their sizes
+_SKIP_OPCODES = {
+    0x94: 1, # MEMOIZE
+    0x93: 1, # STACK_GLOBAL
+    0x71: 2, # BINPUT
+    0x72: 5, # LONG_BINPUT
+}
+
 def _identify_module(file, main=None):
     """identify the name of the module stored in the given file-type object"""
+    try:
+        data = file.peek(256)
+    except NotImplementedError:
+        data = None
+    if data is not None:
+        # fast path for protocols 4 and up: find the _import_module global
+        # and read the SHORT_BINUNICODE that follows it, skipping the memo
+        # opcodes in between; anything else falls through to genops
+        i = data.find(b'\x8c\x0e_import_module')
+        if i != -1:
+            i += 16
+            while i < len(data) and data[i] in _SKIP_OPCODES:
+                i += _SKIP_OPCODES[data[i]]
+            if i + 1 < len(data) and data[i] == 0x8c: # SHORT_BINUNICODE
+                end = i + 2 + data[i+1]
+                if end <= len(data):
+                    try:
+                        return data[i+2:end].decode('utf-8')
+                    except UnicodeDecodeError:
+                        pass
     from pickletools import genops
     UNICODE = {'UNICODE', 'BINUNICODE', 'SHORT_BINUNICODE'}
     found_import = False
@@ -440,7 +520,7 @@ def load_module(
         file = filename
     else:
         if filename is None:
-            filename = str(TEMPDIR/'session.pkl')
+            filename = _default_filename()
         file = open(filename, 'rb')
     try:
         file = _make_peekable(file)
@@ -494,6 +574,8 @@ def load_module(
     finally:
         if not hasattr(filename, 'read'):  # if newly opened file
             file.close()
+        elif isinstance(file, _PeekableReader):
+            file.unread()
         try:
             del sys.modules[runtime_main]
         except (KeyError, NameError):
@@ -573,7 +655,7 @@ def load_module_asdict(
         file = filename
     else:
         if filename is None:
-            filename = str(TEMPDIR/'session.pkl')
+            filename = _default_filename()
         file = open(filename, 'rb')
     try:
         file = _make_peekable(file)
@@ -591,6 +673,8 @@ def load_module_asdict(
     finally:
         if not hasattr(filename, 'read'):  # if newly opened file
             file.close()
+        elif isinstance(file, _PeekableReader):
+            file.unread()
         try:
             if old_main is None:
                 del sys.modules[main_name]
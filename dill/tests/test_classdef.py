@@ -156,6 +156,21 @@ def test_dtype():
     except ImportError: pass
 
 
+def test_numpy_blocked():
+    # numpy is installed, but not importable: plain objects still pickle
+    from dill.tests.__main__ import python, shell, sp
+    code = """if True:
+        import sys, types
+        sys.modules['numpy'] = None
+        import dill
+        class A: pass
+        dill.dumps(A())
+        sys.modules['numpy'] = types.ModuleType('numpy')
+        dill.dumps(A())
+    """
+    assert sp.call([python, '-c', code], shell=shell) == 0
+
+
 def test_array_nested():
     try:
         import numpy as np
@@ -330,6 +345,7 @@ if __name__ == '__main__':
     test_specialtypes()
     test_namedtuple()
     test_dtype()
+    test_numpy_blocked()
     test_array_nested()
     test_array_subclass()
     test_method_decorator()
@@ -48,6 +48,69 @@ def test_isdill():
         pass
 
 
+def test_out_of_band():
+    from pickle import PickleBuffer
+    data = bytearray(b'x' * 1024)
+    obj = [PickleBuffer(data), lambda : my_fn(2)]
+
+    buffers = []
+    obj_str = pickle.dumps(obj, protocol=5, buffer_callback=buffers.append)
+    assert len(buffers) == 1
+    assert bytes(data) not in obj_str
+
+    obj2 = pickle.loads(obj_str, buffers=buffers)
+    assert bytes(obj2[0]) == bytes(data)
+    assert obj2[1]() == 34
+
+
+def test_plain_data():
+    shared = [1.5, None, b'x', b'']
+    obj = {'a': (1, 'two', shared), 'b': [shared, True]}
+
+    for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+        for data in (obj, b''):
+            data_io = StringIO()
+            pickle.Pickler(data_io, protocol).dump(data)
+            assert pickle.dumps(data, protocol) == data_io.getvalue()
+    obj_io = StringIO()
+    pickle.Pickler(obj_io).dump(obj)
+
+    obj2 = pickle.copy(obj)
+    assert obj2 == obj
+    assert obj2['a'][2] is obj2['b'][0]
+
+    from dill._dill import _is_plain_data
+    protocol = pickle.DEFAULT_PROTOCOL
+    assert not _is_plain_data(b'', 2)
+    assert _is_plain_data(obj, protocol)
+    assert _is_plain_data([(), {}, '', 0, -1.0, False], protocol)
+
+    # each of these must go through dill's Pickler
+    class MyList(list):
+        pass
+    module_like = {'__name__': __name__, 'x': 1}
+    assert not _is_plain_data(module_like, protocol)
+    assert not _is_plain_data(MyList([1, 2]), protocol)
+    assert not _is_plain_data({'f': my_fn}, protocol)
+    assert pickle.copy(module_like) == module_like
+    assert type(pickle.copy(MyList([1, 2]))).__name__ == 'MyList'
+    assert pickle.copy({'f': my_fn})['f'](2) == 34
+
+    def save_float(pickler, obj):
+        pickler.save_reduce(float, (repr(obj),), obj=obj)
+    save = pickle.Pickler.dispatch[float]
+    pickle.register(float)(save_float)
+    try:
+        assert not _is_plain_data(obj, protocol)
+        assert pickle.dumps(obj) != obj_io.getvalue()
+        assert pickle.copy(obj) == obj
+    finally:
+        pickle.Pickler.dispatch[float] = save
+    assert _is_plain_data(obj, protocol)
+
+
 if __name__ == '__main__':
     test_extend()
     test_isdill()
+    test_out_of_band()
+    test_plain_data()
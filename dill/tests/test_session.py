@@ -181,6 +181,8 @@ def test_session_other():
 
     session_buffer = BytesIO()
     dill.dump_module(session_buffer, module)
+    session_end = session_buffer.tell()
+    session_buffer.write(b'more data')
 
     for obj in dict_objects:
         del module.__dict__[obj]
@@ -188,6 +190,7 @@ def test_session_other():
     session_buffer.seek(0)
     dill.load_module(session_buffer, module)
 
+    assert session_buffer.tell() == session_end
     assert all(obj in module.__dict__ for obj in dict_objects)
     assert module.selfref is module
 
@@ -271,6 +274,59 @@ def test_load_module_asdict():
         assert 'y' not in main_vars
         assert 'empty' in main_vars
 
+    class SeekableStream(BytesIO):  # seek() only to absolute positions
+        def seek(self, pos):
+            return BytesIO.seek(self, pos)
+
+    # a failed load leaves the caller's stream where it was
+    import pickle
+    for stream in (BytesIO, SeekableStream):
+        not_session = stream(pickle.dumps(list(range(10))))
+        try:
+            dill.load_module_asdict(not_session)
+        except dill.UnpicklingError:
+            pass
+        else:
+            raise AssertionError("loaded a pickle that isn't a session")
+        assert not_session.tell() == 0
+
+def test_dump_module_protocol():
+    import pickle
+    from types import ModuleType
+    mod = ModuleType('__runtime__')
+    mod.data = pickle.PickleBuffer(b'x' * 64)
+
+    buffers = []
+    session_buffer = BytesIO()
+    dill.dump_module(session_buffer, module=mod, protocol=5,
+                     buffer_callback=buffers.append)
+    assert session_buffer.getvalue()[:2] == b'\x80\x05'
+    assert len(buffers) == 1
+
+    session_buffer.seek(0)
+    mod = dill.load_module(session_buffer, buffers=buffers)
+    assert bytes(mod.data) == b'x' * 64
+
+def test_session_tempdir():
+    import shutil
+    import tempfile
+    from types import ModuleType
+    mod = ModuleType('__runtime__')
+    mod.x = 42
+
+    tempdir = tempfile.mkdtemp()
+    saved = vars(dill.session).pop('TEMPDIR', None)
+    try:
+        dill.session.TEMPDIR = tempdir
+        dill.dump_module(module=mod)
+        assert os.path.exists(os.path.join(tempdir, 'session.pkl'))
+        assert dill.load_module().x == 42
+    finally:
+        del dill.session.TEMPDIR
+        if saved is not None:
+            dill.session.TEMPDIR = saved
+        shutil.rmtree(tempdir)
+
 if __name__ == '__main__':
     test_session_main(refimported=False)
     test_session_main(refimported=True)
@@ -278,3 +334,5 @@ if __name__ == '__main__':
     test_runtime_module()
     test_refimported_imported_as()
     test_load_module_asdict()
+    test_dump_module_protocol()
+    test_session_tempdir()
@@ -55,6 +55,17 @@ def test_weakref():
     #   print ("PASS: %s" % obj)
       assert not res
 
+class _guarded:
+    def __getattribute__(self, name):
+        if name.startswith('__reduce') or name in ('__class__', '__getstate__'):
+            return object.__getattribute__(self, name)
+        raise RuntimeError("attribute access on %s" % name)
+
+def test_proxy_guarded():
+    o = _guarded()
+    p = weakref.proxy(o)
+    assert not dill.detect.errors(p)
+
 def test_dictproxy():
     from dill._dill import DictProxyType
     try:
@@ -67,6 +78,7 @@ def test_dictproxy():
 
 if __name__ == '__main__':
     test_weakref()
+    test_proxy_guarded()
     from dill._dill import IS_PYPY
     if not IS_PYPY:
         test_dictproxy()